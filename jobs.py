@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import socket
+import time
+import hashlib
+from contextlib import closing
+from datetime import timedelta
+from dotenv import load_dotenv
+
+# 1) Carrega variáveis de ambiente
+load_dotenv()
+
+# 2) Banco local de estado dos jobs e leases. Réplicas no mesmo host (ou com
+#    o mesmo volume montado) compartilham o arquivo e se coordenam por ele.
+JOBS_DB    = os.getenv("JOBS_DB", "jobs.db")
+REPLICA_ID = os.getenv("REPLICA_ID", f"{socket.gethostname()}:{os.getpid()}")
+
+def _connect():
+    conn = sqlite3.connect(JOBS_DB, timeout=5, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def init_db():
+    """
+    Cria as tabelas de execuções, entregas e leases se não existirem.
+    Retorna True se o banco acabou de ser criado (primeira execução).
+    """
+    with closing(_connect()) as conn:
+        created = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'runs'"
+        ).fetchone() is None
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                job_id   TEXT NOT NULL,
+                run_key  TEXT NOT NULL,
+                done     INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, run_key)
+            );
+            CREATE TABLE IF NOT EXISTS deliveries (
+                job_id   TEXT NOT NULL,
+                run_key  TEXT NOT NULL,
+                user_id  TEXT NOT NULL,
+                owner    TEXT NOT NULL,
+                at       REAL NOT NULL,
+                PRIMARY KEY (job_id, run_key, user_id)
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                name     TEXT PRIMARY KEY,
+                owner    TEXT NOT NULL,
+                expires  REAL NOT NULL
+            );
+        """)
+    return created
+
+def acquire_lease(name, ttl, owner=REPLICA_ID):
+    """
+    Obtém ou renova o lease `name` por `ttl` segundos.
+    Retorna True se `owner` é o dono (novo, renovado ou expirado de outro).
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+        if row and row[0] != owner and row[1] > now:
+            conn.execute("ROLLBACK")
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)",
+            (name, owner, now + ttl)
+        )
+        conn.execute("COMMIT")
+        return True
+    finally:
+        conn.close()
+
+def release_lease(name, owner=REPLICA_ID):
+    """Libera o lease se ainda pertencer a `owner`."""
+    with closing(_connect()) as conn:
+        conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+def start_run(job_id, run_key):
+    """Registra a execução (se ainda não existir) e retorna True se já foi concluída."""
+    with closing(_connect()) as conn:
+        conn.execute("INSERT OR IGNORE INTO runs (job_id, run_key) VALUES (?, ?)", (job_id, run_key))
+        row = conn.execute(
+            "SELECT done FROM runs WHERE job_id = ? AND run_key = ?", (job_id, run_key)
+        ).fetchone()
+    return bool(row[0])
+
+def finish_run(job_id, run_key):
+    """Marca a execução como concluída (registrando-a, se preciso)."""
+    with closing(_connect()) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO runs (job_id, run_key, done) VALUES (?, ?, 1)", (job_id, run_key)
+        )
+
+def claim_delivery(job_id, run_key, user_id, owner=REPLICA_ID):
+    """
+    Reserva a entrega para o usuário antes do envio. Retorna False se alguma
+    réplica já a reservou — garante entrega no máximo uma vez.
+    """
+    with closing(_connect()) as conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO deliveries (job_id, run_key, user_id, owner, at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, run_key, str(user_id), owner, time.time())
+        )
+        return cur.rowcount == 1
+
+def jitter(user_id, run_key, window):
+    """Atraso determinístico (em segundos) do usuário dentro da janela de envio."""
+    digest = hashlib.sha256(f"{user_id}:{run_key}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") % max(int(window), 1)
+
+def last_fire_time(trigger, now, lookback):
+    """
+    Retorna o último disparo do CronTrigger em (now - lookback, now], ou None.
+    O APScheduler 3 só calcula o próximo disparo, então avançamos a partir
+    do início da janela.
+    """
+    last = None
+    fire = trigger.get_next_fire_time(None, now - lookback)
+    while fire is not None and fire <= now:
+        last = fire
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(seconds=1))
+    return last
@@ -0,0 +1,183 @@
+import os
+import json
+import fcntl
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# 1) Carrega variáveis de ambiente
+load_dotenv()
+
+# 2) Journal local (JSONL, só acrescenta) com as escritas que não chegaram à
+#    planilha. Cada linha é uma operação com número de sequência crescente;
+#    a linha só é considerada gravada depois do fsync. Réplicas que montam o
+#    mesmo volume dividem o arquivo: toda alteração é feita sob flock, relendo
+#    o disco, e só uma réplica reaplica por vez.
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "journal.jsonl")
+
+_pending = None   # operações ainda não aplicadas, em ordem de seq
+_stamp   = None   # (inode, tamanho, mtime) do arquivo quando _pending foi lido
+
+@contextmanager
+def _lock(suffix=".lock", wait=True):
+    """
+    flock exclusivo num arquivo ao lado do journal. Com wait=False, entrega
+    False em vez de esperar se outro processo já tem o lock.
+    """
+    with open(JOURNAL_PATH + suffix, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _file_stamp():
+    try:
+        st = os.stat(JOURNAL_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def _load():
+    """
+    Lê o journal do disco, ignorando uma última linha truncada e seqs
+    repetidos. Relê sempre que o arquivo mudou (inclusive por outro processo).
+    """
+    global _pending, _stamp
+    stamp = _file_stamp()
+    if _pending is not None and stamp == _stamp:
+        return _pending
+    ops, seen = [], set()
+    if os.path.exists(JOURNAL_PATH):
+        with open(JOURNAL_PATH, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue  # escrita interrompida no meio da linha
+                if op["seq"] not in seen:
+                    seen.add(op["seq"])
+                    ops.append(op)
+    ops.sort(key=lambda op: op["seq"])
+    _pending, _stamp = ops, stamp
+    return _pending
+
+def pending():
+    """Retorna as operações pendentes, em ordem."""
+    return list(_load())
+
+def append(op):
+    """Grava a operação no journal com o próximo seq e faz fsync. Retorna o seq."""
+    with _lock():
+        ops = _load()
+        op = dict(op, seq=(ops[-1]["seq"] + 1) if ops else 1)
+        line = json.dumps(op, ensure_ascii=False) + "\n"
+        if os.path.exists(JOURNAL_PATH) and os.path.getsize(JOURNAL_PATH):
+            with open(JOURNAL_PATH, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line  # fecha a linha truncada de uma escrita interrompida
+        with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+    return op["seq"]
+
+def _rewrite(ops):
+    """Substitui o journal por `ops` de forma atômica e durável (chamar sob _lock)."""
+    global _pending, _stamp
+    tmp = JOURNAL_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for op in ops:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, JOURNAL_PATH)
+    # o rename só sobrevive a uma queda depois do fsync do diretório
+    fd = os.open(os.path.dirname(os.path.abspath(JOURNAL_PATH)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    _pending, _stamp = ops, _file_stamp()
+
+def compact(applied_seq):
+    """
+    Remove do journal as operações com seq <= applied_seq, relendo o disco
+    sob lock para manter o que outros processos acrescentaram nesse meio tempo.
+    """
+    with _lock():
+        _rewrite([op for op in _load() if op["seq"] > applied_seq])
+
+def remap(old_id, new_id, from_seq):
+    """
+    Troca o ID `old_id` por `new_id` na inclusão de seq `from_seq` e nas
+    operações seguintes sobre ele, gravando no journal antes de reaplicar.
+    Retorna a inclusão atualizada.
+    """
+    with _lock():
+        ops = []
+        for op in _load():
+            if op["seq"] >= from_seq and str(op["id"]) == str(old_id):
+                op = dict(op, id=new_id)
+                if op["op"] == "add":
+                    op["row"] = [new_id] + op["row"][1:]
+            ops.append(op)
+        _rewrite(ops)
+    return next(op for op in ops if op["seq"] == from_seq)
+
+def replay(ids, read_row, apply, is_offline):
+    """
+    Reaplica as operações pendentes em ordem de seq e compacta o journal.
+    - ids: lista dos IDs (str) na planilha, em ordem; mantida em dia durante a reaplicação
+    - read_row(id): linha atual da planilha com esse ID
+    - apply(op): grava a operação; False se o ID não existe mais (descartada)
+    - is_offline(e): se True, para e deixa o resto para a próxima vez
+    Inclusões cujo ID já está na planilha com o mesmo Timestamp e usuário
+    (reaplicação interrompida) são ignoradas. Se o ID foi usado por outro
+    lançamento, a inclusão e as operações seguintes sobre ela ganham um ID
+    novo, gravado no journal antes de qualquer escrita. Retorna {antigo: novo}.
+    Se outro processo já está reaplicando, não faz nada.
+    """
+    with _lock(".replay", wait=False) as locked:
+        if not locked:
+            return {}
+        return _replay(ids, read_row, apply, is_offline)
+
+def _replay(ids, read_row, apply, is_offline):
+    remapped = {}
+    applied = 0
+    try:
+        for op in pending():
+            op = next(o for o in _load() if o["seq"] == op["seq"])  # pode ter sido remapeada
+            lid = str(op["id"])
+            if op["op"] == "add" and lid in ids:
+                existing = read_row(lid)
+                if existing[1:3] == [str(v) for v in op["row"][1:3]]:
+                    applied = op["seq"]
+                    continue
+                known = [int(i) for i in ids if i.isdigit()]
+                known += [int(o["id"]) for o in _load() if o["op"] == "add" and str(o["id"]).isdigit()]
+                new_id = max(known) + 1
+                print(f"Journal: ID {lid} já usado, lançamento gravado como {new_id}.")
+                op = remap(lid, new_id, op["seq"])
+                remapped[lid] = str(new_id)
+            if not apply(op):
+                print(f"Journal: ID {op['id']} não existe mais, '{op['op']}' ignorado.")
+            elif op["op"] == "add":
+                ids.append(str(op["id"]))
+            elif op["op"] == "delete" and str(op["id"]) in ids:
+                ids.remove(str(op["id"]))
+            applied = op["seq"]
+    except Exception as e:
+        if not is_offline(e):
+            if applied:
+                compact(applied)
+            raise
+        print(f"Planilha ainda indisponível, {len(_load())} operação(ões) no journal: {e}")
+    if applied:
+        compact(applied)
+    return remapped
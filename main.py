@@ -1,5 +1,6 @@
 import os
 import io
+import asyncio
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
@@ -24,11 +25,15 @@ from telegram.ext import (
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from sheets import (
     init_sheets,
+    load_cache,
     add_lancamento,
-    get_last_lancamentos,
+    get_lancamento,
+    search_lancamentos,
+    PAGE_SIZE,
     update_lancamento,
     delete_lancamento,
     get_all_lancamentos,
@@ -36,7 +41,23 @@ from sheets import (
     get_categories,
     add_category,
     delete_category,
-    generate_report
+    generate_report,
+    has_pending_writes,
+    replay_journal,
+    get_tenant,
+    create_group,
+    join_group,
+    leave_group
+)
+from jobs import (
+    init_db,
+    acquire_lease,
+    release_lease,
+    start_run,
+    finish_run,
+    claim_delivery,
+    jitter,
+    last_fire_time
 )
 
 load_dotenv()
@@ -50,6 +71,8 @@ MAIN_KEYBOARD = ReplyKeyboardMarkup(
      ["⚙️ Categorias", "❓ Ajuda"]],
     resize_keyboard=True
 )
+# Botões do teclado principal, para não serem lidos como texto de um fluxo
+MENU_BUTTONS = filters.Regex("^(➕ Novo|✏️ Editar|🗑️ Excluir|📊 Relatório|⚙️ Categorias|❓ Ajuda)$")
 
 # Estados
 TYPE, VALUE, CATEGORY, DESC, CONFIRM      = range(5)
@@ -58,15 +81,44 @@ DEL_SELECT, DEL_CONFIRM                   = range(10, 12)
 R_TYPE                                   = 12
 ADD_CAT_NAME, ADD_CAT_CONFIRM             = 13, 14
 DEL_CAT_SELECT, DEL_CAT_CONFIRM           = 15, 16
+EFILTER, DEL_FILTER                       = 17, 18
+
+# Estados do seletor (editar/excluir): lista e espera do texto do filtro
+PICKER_STATES = {"edit": (SELECT, EFILTER), "del": (DEL_SELECT, DEL_FILTER)}
 
 # Scheduler
 tz = pytz.timezone(TIMEZONE)
 scheduler = AsyncIOScheduler(timezone=tz)
 app = None
 
+# Relatórios periódicos: cada envio é espalhado em REPORT_WINDOW segundos a
+# partir do disparo; disparos perdidos nas últimas CATCHUP_HOURS são retomados.
+REPORT_JOBS = {
+    "rel_semanal":   ("Semanal",   CronTrigger(day_of_week="mon", hour=9, minute=0, timezone=tz)),
+    "rel_quinzenal": ("Quinzenal", CronTrigger(day="1,15", hour=9, minute=0, timezone=tz)),
+    "rel_mensal":    ("Mensal",    CronTrigger(day="last", hour=18, minute=0, timezone=tz))
+}
+REPORT_WINDOW = int(os.getenv("REPORT_WINDOW", "1800"))
+CATCHUP_HOURS = int(os.getenv("CATCHUP_HOURS", "24"))
+LEASE_TTL     = 120
+_running      = set()   # leases com envio em andamento nesta réplica
+_tasks        = set()   # referências fortes às tarefas de envio
+
+async def db(fn, *args):
+    """Roda uma chamada do jobs.db fora do event loop (o SQLite pode esperar lock)."""
+    return await asyncio.to_thread(fn, *args)
+
 async def start_scheduler(application: Application):
     scheduler.start()
 
+async def replay_pending_writes():
+    """Reenvia à planilha as escritas feitas em modo offline."""
+    if has_pending_writes():
+        replay_journal()
+
+def offline_note():
+    return "\n_(planilha indisponível: salvo localmente, será sincronizado)_" if has_pending_writes() else ""
+
 # --- Comandos básicos ---
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -88,12 +140,13 @@ async def duvida(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🤖 *Ajuda Rápida* 🤖\n\n"
         "/start — menu principal\n"
         "/novo — registra despesa/receita\n"
-        "/editar — edita um lançamento\n"
-        "/excluir — exclui um lançamento\n"
+        "/editar [filtro] — edita um lançamento\n"
+        "/excluir [filtro] — exclui um lançamento\n"
         "/relatorio — gera relatório\n"
         "/categorias — lista categorias\n"
         "/addcategoria — adiciona categoria\n"
         "/delcategoria — remove categoria\n"
+        "/grupo — mostra/gerencia o grupo (carteira compartilhada)\n"
         "/duvida — esta ajuda\n"
         "/cancelar — cancela fluxo atual"
     )
@@ -127,7 +180,7 @@ async def novo_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except:
         return await update.message.reply_text("Valor inválido. Digite um número maior que zero:")
     context.user_data["valor"] = val
-    cats = get_categories()
+    cats = get_categories(get_tenant(update.effective_user.id))
     if not cats:
         return await update.message.reply_text("Nenhuma categoria disponível. Use /addcategoria.")
     kb = InlineKeyboardMarkup([[InlineKeyboardButton(c, callback_data=c)] for c in cats])
@@ -170,7 +223,7 @@ async def novo_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
             categoria=d["categoria"],
             descricao=d["descricao"]
         )
-        await q.edit_message_text(f"✅ ID *{new_id}* registrado.", parse_mode="Markdown")
+        await q.edit_message_text(f"✅ ID *{new_id}* registrado.{offline_note()}", parse_mode="Markdown")
     else:
         await q.edit_message_text("❌ Cancelado.")
     context.user_data.clear()
@@ -178,26 +231,89 @@ async def novo_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- /editar ---
 
-async def editar_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    uid = update.effective_user.id
-    lancs = get_last_lancamentos(uid)
-    if not lancs:
-        await update.message.reply_text("Nenhum lançamento para editar.")
-        return ConversationHandler.END
+def picker_markup(grupo, prefix, filtro, anchor=None, sync=True):
+    """
+    Monta texto e teclado de uma página do seletor. Os botões de navegação
+    carregam o ID que abre a página (cursor); o filtro fica em
+    context.user_data. Trocar de página não consulta a planilha.
+    """
+    res = search_lancamentos(grupo, filtro, anchor, PAGE_SIZE, sync=sync)
+    page, offset, total = res["page"], res["offset"], res["total"]
     buttons = [
         [InlineKeyboardButton(
-            f"{l['ID']} – {l['Timestamp']} – R$ {float(l['Valor']):.2f} – {l['Categoria']}",
-            callback_data=f"edit_{l['ID']}"
-        )] for l in reversed(lancs)
+            f"{l['ID']} – {l['Timestamp']} – R$ {float(l['Valor'] or 0):.2f} – {l['Categoria']}",
+            callback_data=f"{prefix}_{l['ID']}"
+        )] for l in page
     ]
-    await update.message.reply_text("Selecione um lançamento:", reply_markup=InlineKeyboardMarkup(buttons))
+    nav = []
+    if res["prev"] is not None:
+        nav.append(InlineKeyboardButton("⬅️", callback_data=f"{prefix}p_{res['prev']}"))
+    if res["next"] is not None:
+        nav.append(InlineKeyboardButton("➡️", callback_data=f"{prefix}p_{res['next']}"))
+    if nav:
+        buttons.append(nav)
+    if filtro:
+        buttons.append([InlineKeyboardButton("✖️ Limpar filtro", callback_data=f"{prefix}c")])
+    else:
+        buttons.append([InlineKeyboardButton("🔎 Filtrar", callback_data=f"{prefix}f")])
+    if total:
+        texto = f"Selecione um lançamento ({offset + 1}–{offset + len(page)} de {total}):"
+    else:
+        texto = "Nenhum lançamento encontrado."
+    if filtro:
+        texto = f"Filtro: {filtro}\n" + texto
+    return texto, InlineKeyboardMarkup(buttons)
+
+async def picker_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Navegação do seletor: troca de página, pedido de filtro ou limpeza."""
+    q = update.callback_query; await q.answer()
+    prefix, _, arg = q.data.partition("_")
+    if prefix.endswith("f"):
+        await q.edit_message_text(
+            "Envie o filtro: nome da categoria, data (AAAA-MM ou AAAA-MM-DD) "
+            "ou parte da descrição."
+        )
+        return PICKER_STATES[prefix[:-1]][1]
+    if prefix.endswith("c"):
+        context.user_data.pop("filtro", None)
+        anchor = None
+    else:
+        anchor = arg
+    texto, kb = picker_markup(get_tenant(q.from_user.id), prefix[:-1],
+                              context.user_data.get("filtro", ""), anchor, sync=False)
+    await q.edit_message_text(texto, reply_markup=kb)
+    return None
+
+async def picker_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recebe o texto do filtro e mostra a primeira página filtrada."""
+    filtro = update.message.text.strip()
+    context.user_data["filtro"] = filtro
+    picker = context.user_data["picker"]
+    texto, kb = picker_markup(get_tenant(update.effective_user.id), picker, filtro)
+    await update.message.reply_text(texto, reply_markup=kb)
+    return PICKER_STATES[picker][0]
+
+async def editar_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    grupo = get_tenant(update.effective_user.id)
+    filtro = " ".join(context.args or [])
+    if not filtro and not search_lancamentos(grupo, limit=1)["total"]:
+        await update.message.reply_text("Nenhum lançamento para editar.")
+        return ConversationHandler.END
+    context.user_data["picker"] = "edit"
+    context.user_data["filtro"] = filtro
+    texto, kb = picker_markup(grupo, "edit", filtro, sync=False)
+    await update.message.reply_text(texto, reply_markup=kb)
     return SELECT
 
 async def editar_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query; await q.answer()
     lid = q.data.split("_", 1)[1]
+    orig = get_lancamento(lid)
+    if not orig or orig["Grupo"] != get_tenant(q.from_user.id):
+        await q.edit_message_text(f"⚠️ ID {lid} não encontrado.")
+        context.user_data.clear()
+        return ConversationHandler.END
     context.user_data["edit_id"] = lid
-    orig = next((l for l in get_last_lancamentos(q.from_user.id, limit=1000) if l["ID"] == lid), {})
     context.user_data["orig"] = orig
     await q.edit_message_text(f"*ID {lid}* selecionado.\nValor atual: R$ {orig.get('Valor')}\nEnvie novo valor:", parse_mode="Markdown")
     return EVAL
@@ -209,7 +325,7 @@ async def editar_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except:
         return await update.message.reply_text("Valor inválido. Digite um número maior que zero:")
     context.user_data["new_valor"] = val
-    cats = get_categories()
+    cats = get_categories(get_tenant(update.effective_user.id))
     if not cats:
         return await update.message.reply_text("Nenhuma categoria disponível.")
     kb = InlineKeyboardMarkup([[InlineKeyboardButton(c, callback_data=c)] for c in cats])
@@ -245,11 +361,12 @@ async def editar_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
         d = context.user_data
         update_lancamento(
             lanc_id=d["edit_id"],
+            grupo=get_tenant(q.from_user.id),
             valor=d["new_valor"],
             categoria=d["new_categoria"],
             descricao=d["new_descricao"]
         )
-        await q.edit_message_text(f"✅ ID *{d['edit_id']}* atualizado.", parse_mode="Markdown")
+        await q.edit_message_text(f"✅ ID *{d['edit_id']}* atualizado.{offline_note()}", parse_mode="Markdown")
     else:
         await q.edit_message_text("❌ Cancelado.")
     context.user_data.clear()
@@ -258,23 +375,25 @@ async def editar_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # --- /excluir ---
 
 async def excluir_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    uid = update.effective_user.id
-    lancs = get_last_lancamentos(uid)
-    if not lancs:
+    grupo = get_tenant(update.effective_user.id)
+    filtro = " ".join(context.args or [])
+    if not filtro and not search_lancamentos(grupo, limit=1)["total"]:
         await update.message.reply_text("Nenhum lançamento para excluir.")
         return ConversationHandler.END
-    buttons = [
-        [InlineKeyboardButton(
-            f"{l['ID']} – {l['Timestamp']} – R$ {float(l['Valor']):.2f} – {l['Categoria']}",
-            callback_data=f"del_{l['ID']}"
-        )] for l in reversed(lancs)
-    ]
-    await update.message.reply_text("Selecione um lançamento:", reply_markup=InlineKeyboardMarkup(buttons))
+    context.user_data["picker"] = "del"
+    context.user_data["filtro"] = filtro
+    texto, kb = picker_markup(grupo, "del", filtro, sync=False)
+    await update.message.reply_text(texto, reply_markup=kb)
     return DEL_SELECT
 
 async def excluir_select(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query; await q.answer()
     lid = q.data.split("_", 1)[1]
+    orig = get_lancamento(lid)
+    if not orig or orig["Grupo"] != get_tenant(q.from_user.id):
+        await q.edit_message_text(f"⚠️ ID {lid} não encontrado.")
+        context.user_data.clear()
+        return ConversationHandler.END
     context.user_data["del_id"] = lid
     kb = InlineKeyboardMarkup([[
         InlineKeyboardButton("✅ Sim", callback_data="yes"),
@@ -287,8 +406,8 @@ async def excluir_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query; await q.answer()
     lid = context.user_data["del_id"]
     if q.data == "yes":
-        delete_lancamento(lid)
-        await q.edit_message_text(f"✅ ID *{lid}* excluído.", parse_mode="Markdown")
+        delete_lancamento(lid, get_tenant(q.from_user.id))
+        await q.edit_message_text(f"✅ ID *{lid}* excluído.{offline_note()}", parse_mode="Markdown")
     else:
         await q.edit_message_text("❌ Cancelado.")
     context.user_data.clear()
@@ -308,7 +427,7 @@ async def relatorio_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def relatorio_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query; await q.answer()
     period = q.data
-    rpt = generate_report(period)
+    rpt = generate_report(period, get_tenant(q.from_user.id))
     texto = (
         f"🗓 *Relatório {period}*\n"
         f"Período: {rpt['start'].date()} a {rpt['end'].date()}\n"
@@ -323,7 +442,7 @@ async def relatorio_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # --- categorias CRUD ---
 
 async def lista_categorias(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    cats = get_categories()
+    cats = get_categories(get_tenant(update.effective_user.id))
     texto = ("Categorias:\n" + "\n".join(f"• {c}" for c in cats)) if cats else "Nenhuma categoria cadastrada."
     await update.message.reply_text(texto)
 
@@ -345,7 +464,7 @@ async def addcat_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query; await q.answer()
     name = context.user_data["new_cat"]
     if q.data == "yes":
-        ok = add_category(name)
+        ok = add_category(name, get_tenant(q.from_user.id))
         msg = f"✅ Categoria '{name}' adicionada." if ok else f"⚠️ Categoria '{name}' já existe."
     else:
         msg = "❌ Operação cancelada."
@@ -354,7 +473,7 @@ async def addcat_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 async def delcat_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    cats = get_categories()
+    cats = get_categories(get_tenant(update.effective_user.id))
     if not cats:
         await update.message.reply_text("Nenhuma categoria para excluir.")
         return ConversationHandler.END
@@ -377,7 +496,7 @@ async def delcat_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query; await q.answer()
     name = context.user_data["del_cat"]
     if q.data == "yes":
-        ok = delete_category(name)
+        ok = delete_category(name, get_tenant(q.from_user.id))
         msg = f"✅ Categoria '{name}' excluída." if ok else f"⚠️ Categoria '{name}' não encontrada."
     else:
         msg = "❌ Operação cancelada."
@@ -385,10 +504,36 @@ async def delcat_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.clear()
     return ConversationHandler.END
 
+# --- grupos (carteira compartilhada) ---
+
+async def grupo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    uid = update.effective_user.id
+    arg = " ".join(context.args or []).strip()
+    if arg == "novo":
+        code = create_group(uid)
+        texto = f"✅ Grupo criado. Compartilhe o código `{code}` para outros entrarem com /grupo {code}."
+    elif arg == "sair":
+        leave_group(uid)
+        texto = "✅ Você voltou para a sua carteira pessoal."
+    elif arg:
+        if not join_group(uid, arg):
+            # texto livre do usuário: sem Markdown para não quebrar o parse
+            return await update.message.reply_text(f"⚠️ Grupo '{arg}' não encontrado.")
+        texto = f"✅ Você entrou no grupo `{arg}`."
+    else:
+        atual = get_tenant(uid)
+        texto = (
+            ("Carteira pessoal." if atual == str(uid) else f"Grupo atual: `{atual}`") + "\n\n"
+            "/grupo novo — cria um grupo\n"
+            "/grupo <código> — entra num grupo\n"
+            "/grupo sair — volta para a carteira pessoal"
+        )
+    await update.message.reply_markdown(texto)
+
 # --- relatórios agendados ---
 
 async def send_report_to_user(bot, user_id, period):
-    rpt = generate_report(period)
+    rpt = generate_report(period, get_tenant(user_id))
     texto = (
         f"🗓 *Relatório {period}*\n"
         f"Período: {rpt['start'].date()} a {rpt['end'].date()}\n"
@@ -399,22 +544,83 @@ async def send_report_to_user(bot, user_id, period):
         texto += f"  • {cat}: R$ {val:.2f}\n"
     await bot.send_message(chat_id=int(user_id), text=texto, parse_mode="Markdown")
 
-async def broadcast_report(period):
-    bot = app.bot
-    for uid in get_all_user_ids():
-        await send_report_to_user(bot, uid, period)
+async def run_report_job(job_id):
+    """
+    Entrega o último disparo de `job_id` que ainda não foi concluído.
+    Só a réplica com o lease da execução envia; cada usuário é reservado em
+    jobs.db antes do envio, então ninguém recebe o mesmo relatório duas vezes.
+    """
+    period, trigger = REPORT_JOBS[job_id]
+    now = datetime.now(tz)
+    fire = last_fire_time(trigger, now, timedelta(hours=CATCHUP_HOURS))
+    if fire is None:
+        return
+    run_key = fire.isoformat()
+    lease = f"{job_id}:{run_key}"
+    # reserva nesta réplica antes do primeiro await: outro disparo do mesmo
+    # job (cron e catch-up juntos) não pode passar pela checagem no meio
+    if lease in _running:
+        return
+    _running.add(lease)
+    try:
+        if await db(start_run, job_id, run_key):
+            return
+        if not await db(acquire_lease, lease, LEASE_TTL):
+            return
+        # retomada fora da janela original: espalha de novo a partir de agora
+        base = fire if (now - fire).total_seconds() < REPORT_WINDOW else now
+        users = sorted(get_all_user_ids(), key=lambda u: jitter(u, run_key, REPORT_WINDOW))
+        for uid in users:
+            at = base + timedelta(seconds=jitter(uid, run_key, REPORT_WINDOW))
+            while (wait := (at - datetime.now(tz)).total_seconds()) > 0:
+                await asyncio.sleep(min(wait, LEASE_TTL / 3))
+                if not await db(acquire_lease, lease, LEASE_TTL):
+                    return
+            if not await db(acquire_lease, lease, LEASE_TTL):
+                return
+            if not await db(claim_delivery, job_id, run_key, uid):
+                continue
+            try:
+                await send_report_to_user(app.bot, uid, period)
+            except Exception as e:
+                print(f"Falha ao enviar relatório {period} para {uid}: {e}")
+        await db(finish_run, job_id, run_key)
+    finally:
+        _running.discard(lease)
+        await db(release_lease, lease)
+
+async def catch_up_reports():
+    """Retoma execuções perdidas (reinício, réplica que caiu no meio do envio)."""
+    for job_id in REPORT_JOBS:
+        task = asyncio.create_task(run_report_job(job_id))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+def seed_report_runs():
+    """
+    Na primeira execução com jobs.db, marca como concluídos os disparos
+    recentes: o agendador antigo já os enviou e a retomada não deve repetir.
+    """
+    now = datetime.now(tz)
+    for job_id, (period, trigger) in REPORT_JOBS.items():
+        fire = last_fire_time(trigger, now, timedelta(hours=CATCHUP_HOURS))
+        if fire is not None:
+            finish_run(job_id, fire.isoformat())
 
 def main():
     global app
     init_sheets()
-
-    # agenda relatórios
-    scheduler.add_job(broadcast_report, CronTrigger(day_of_week="mon", hour=9, minute=0),
-                      args=["Semanal"], id="rel_semanal")
-    scheduler.add_job(broadcast_report, CronTrigger(day="1,15", hour=9, minute=0),
-                      args=["Quinzenal"], id="rel_quinzenal")
-    scheduler.add_job(broadcast_report, CronTrigger(day="last", hour=18, minute=0),
-                      args=["Mensal"], id="rel_mensal")
+    load_cache()
+    if init_db():
+        seed_report_runs()
+
+    # agenda relatórios e a retomada periódica (também roda logo ao iniciar)
+    for job_id, (period, trigger) in REPORT_JOBS.items():
+        scheduler.add_job(run_report_job, trigger, args=[job_id], id=job_id)
+    scheduler.add_job(catch_up_reports, IntervalTrigger(minutes=5, timezone=tz),
+                      id="catch_up", next_run_time=datetime.now(tz))
+    scheduler.add_job(replay_pending_writes, IntervalTrigger(seconds=30, timezone=tz),
+                      id="replay_journal", next_run_time=datetime.now(tz))
 
     app = Application.builder()\
         .token(TOKEN)\
@@ -425,6 +631,7 @@ def main():
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("duvida", duvida))
     app.add_handler(CommandHandler("cancelar", cancel))
+    app.add_handler(CommandHandler("grupo", grupo))
 
     # Conversas
     app.add_handler(ConversationHandler(
@@ -448,7 +655,11 @@ def main():
             MessageHandler(filters.Regex("^✏️ Editar$"), editar_start)
         ],
         states={
-            SELECT: [CallbackQueryHandler(editar_select, pattern="^edit_")],
+            SELECT: [
+                CallbackQueryHandler(editar_select, pattern="^edit_"),
+                CallbackQueryHandler(picker_page, pattern="^edit(p_|f$|c$)")
+            ],
+            EFILTER: [MessageHandler(filters.TEXT & ~filters.COMMAND & ~MENU_BUTTONS, picker_filter)],
             EVAL:   [MessageHandler(filters.TEXT & ~filters.COMMAND, editar_value)],
             ECAT:   [CallbackQueryHandler(editar_category_chosen)],
             EDESC:  [MessageHandler(filters.TEXT & ~filters.COMMAND, editar_desc)],
@@ -463,7 +674,11 @@ def main():
             MessageHandler(filters.Regex("^🗑️ Excluir$"), excluir_start)
         ],
         states={
-            DEL_SELECT:  [CallbackQueryHandler(excluir_select, pattern="^del_")],
+            DEL_SELECT:  [
+                CallbackQueryHandler(excluir_select, pattern="^del_"),
+                CallbackQueryHandler(picker_page, pattern="^del(p_|f$|c$)")
+            ],
+            DEL_FILTER:  [MessageHandler(filters.TEXT & ~filters.COMMAND & ~MENU_BUTTONS, picker_filter)],
             DEL_CONFIRM: [CallbackQueryHandler(excluir_confirm)]
         },
         fallbacks=[CommandHandler("cancelar", cancel)]
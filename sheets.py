@@ -1,5 +1,10 @@
 import os
+import re
+import secrets
+import time
 import gspread
+import requests
+from google.auth.exceptions import TransportError
 from google.oauth2.service_account import Credentials
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
@@ -7,6 +12,8 @@ import pytz
 import calendar
 from collections import defaultdict
 
+import journal
+
 # 1) Carrega variáveis de ambiente
 load_dotenv()
 
@@ -48,11 +55,58 @@ DEFAULT_CATEGORIES = [
 
 # 5) Nomes das abas e cabeçalhos
 SHEETS = {
-    "Lançamentos": ["ID", "Timestamp", "Telegram User ID", "Nome", "Tipo", "Valor", "Categoria", "Descrição"],
+    "Lançamentos": ["ID", "Timestamp", "Telegram User ID", "Nome", "Tipo", "Valor", "Categoria", "Descrição", "Grupo"],
     "Config":      ["Último ID"],
-    "Categorias":  ["Categoria"]
+    "Categorias":  ["Categoria", "Grupo"],
+    "Grupos":      ["Telegram User ID", "Grupo"]
+}
+
+# 6) Cache local da aba 'Lançamentos' com sincronização incremental.
+#    O modifiedTime do Drive indica se algo mudou; só então lemos a coluna de IDs
+#    e buscamos apenas as linhas novas (tail read) e a janela final da planilha.
+#    Exclusões/reordenações no meio da planilha forçam recarga completa, assim
+#    como uma mudança que não aparece na janela final (edição manual em linha
+#    antiga). A recarga completa periódica é só uma rede de segurança.
+SYNC_INTERVAL      = float(os.getenv("SYNC_INTERVAL", "5"))
+SYNC_WINDOW        = int(os.getenv("SYNC_WINDOW", "50"))
+FULL_SYNC_INTERVAL = float(os.getenv("FULL_SYNC_INTERVAL", "600"))
+
+_cache = {
+    "rows": [],         # linhas de dados (sem cabeçalho), como vindas da planilha
+    "mtime": None,      # modifiedTime do Drive na última sincronização
+    "checked": 0.0,     # quando o modifiedTime foi consultado pela última vez
+    "full": 0.0,        # quando foi feita a última recarga completa
+    "own_write": False, # o bot escreveu na planilha desde a última sincronização
+    "by_id": {},        # ID -> linha
+    "by_user": {},      # Telegram User ID -> linhas, na ordem da planilha
+    "tenants": {}       # Grupo -> partição (ver _new_partition)
 }
 
+# 7) Multi-tenant: cada usuário pertence a um grupo (carteira compartilhada) ou,
+#    por padrão, ao grupo pessoal cujo id é o próprio Telegram User ID.
+#    Lançamentos antigos sem 'Grupo' pertencem ao grupo pessoal do autor e
+#    categorias sem 'Grupo' servem de modelo para grupos novos. Cada grupo
+#    criado ganha em 'Grupos' uma linha sem usuário, que o mantém registrado
+#    mesmo depois que todos saírem.
+GROUP_PREFIX = "g-"
+
+_tenants = {
+    "groups": None,     # Telegram User ID -> Grupo (só quem entrou num grupo)
+    "known": set(),     # códigos de grupos já criados
+    "categories": None, # Grupo -> lista de categorias; "" guarda o modelo
+    "loaded": 0.0,      # quando 'Grupos' e 'Categorias' foram lidas
+    "stale": False      # a planilha mudou por fora: reler na próxima consulta
+}
+
+# 8) Modo offline: se a API do Sheets estiver fora ou sem cota, inclusões,
+#    edições e exclusões vão para o journal local e são reaplicadas em ordem
+#    quando a API voltar. Enquanto houver pendências, novas escritas também
+#    entram no journal, para não passarem na frente das antigas.
+OFFLINE_STATUS = {429, 500, 502, 503, 504}
+
+DATE_FILTER = re.compile(r"^\d{4}(-\d{2}){0,2}$")
+PAGE_SIZE   = 8   # lançamentos por página no seletor de editar/excluir
+
 def init_sheets():
     """
     Garante que cada aba exista e, se estiver vazia, escreve o cabeçalho.
@@ -68,6 +122,14 @@ def init_sheets():
         if not ws.row_values(1):
             ws.insert_row(header, index=1)
             print(f"Cabeçalho da aba '{name}' inserido.")
+        # abas antigas ganham as colunas novas (ex.: 'Grupo')
+        current = ws.row_values(1)
+        if len(current) < len(header):
+            if ws.col_count < len(header):
+                ws.add_cols(len(header) - ws.col_count)
+            for col in range(len(current), len(header)):
+                ws.update_cell(1, col + 1, header[col])
+            print(f"Cabeçalho da aba '{name}' atualizado.")
         # se for aba Categorias e só tiver header, popula defaults
         if name == "Categorias":
             vals = ws.get_all_values()
@@ -92,9 +154,404 @@ def update_last_id(new_id):
     else:
         cfg.update_cell(2, 1, str(new_id))
 
+def _pad(row):
+    """Completa a linha até o número de colunas de 'Lançamentos'."""
+    width = len(SHEETS["Lançamentos"])
+    return list(row) + [""] * (width - len(row))
+
+def _tenant_of(row):
+    """Grupo da linha; linhas antigas sem 'Grupo' são do grupo pessoal do autor."""
+    return row[8] or row[2]
+
+def _new_partition(rows, version=0):
+    """
+    Partição de um grupo no cache: suas linhas, uma versão própria e a
+    memória das buscas do seletor. Mudanças num grupo só invalidam a dele.
+    """
+    return {"rows": rows, "version": version, "search": {}}
+
+def _partition(grupo):
+    part = _cache["tenants"].get(grupo)
+    if part is None:
+        part = _cache["tenants"][grupo] = _new_partition([])
+    return part
+
+def _touch(grupo):
+    """Marca a partição do grupo como alterada (descarta as buscas memorizadas)."""
+    part = _partition(grupo)
+    part["version"] += 1
+    part["search"] = {}
+
+def _reindex():
+    """
+    Reconstrói os índices a partir de _cache['rows'] (após ler a planilha).
+    Partições de grupos cujas linhas não mudaram são mantidas como estão.
+    """
+    by_id, by_user, by_tenant = {}, {}, {}
+    for r in _cache["rows"]:
+        if r[0]:
+            by_id[r[0]] = r
+        if r[2]:
+            by_user.setdefault(r[2], []).append(r)
+        tenant = _tenant_of(r)
+        if tenant:
+            by_tenant.setdefault(tenant, []).append(r)
+    old = _cache["tenants"]
+    tenants = {}
+    for grupo, rows in by_tenant.items():
+        part = old.get(grupo)
+        if part is not None and part["rows"] == rows:
+            part["rows"] = rows
+            tenants[grupo] = part
+        else:
+            tenants[grupo] = _new_partition(rows, part["version"] + 1 if part else 0)
+    _cache["by_id"] = by_id
+    _cache["by_user"] = by_user
+    _cache["tenants"] = tenants
+
+def load_cache():
+    """
+    Carrega o cache de 'Lançamentos', 'Grupos' e 'Categorias' na partida,
+    para que o bot continue atendendo se a API cair logo depois.
+    """
+    try:
+        _sync_lancamentos(force=True)
+        _load_tenants(force=True)
+    except Exception as e:
+        if not _is_offline(e):
+            raise
+        print(f"Planilha indisponível na partida, cache vazio por enquanto: {e}")
+
+def _full_reload(ws, mtime):
+    """Baixa a aba inteira e substitui o cache."""
+    _cache["rows"] = [_pad(r) for r in ws.get_all_values()[1:]]
+    _cache["mtime"] = mtime
+    _cache["full"] = time.monotonic()
+    _cache["own_write"] = False
+    _reindex()
+    _overlay_journal()
+
+def _sync_lancamentos(force=False):
+    """
+    Sincroniza o cache de 'Lançamentos' com a planilha e retorna as linhas.
+    Com a API indisponível, segue servindo o cache (se já carregado).
+    """
+    try:
+        return _pull_lancamentos(force)
+    except Exception as e:
+        if _cache["mtime"] is None or not _is_offline(e):
+            raise
+        print(f"Planilha indisponível, usando cache local: {e}")
+        return _cache["rows"]
+
+def _mark_own_write():
+    """Registra que o bot alterou a planilha (o modifiedTime vai mudar)."""
+    _cache["own_write"] = True
+
+def _pull_lancamentos(force=False):
+    """
+    Consulta o modifiedTime no máximo a cada SYNC_INTERVAL segundos; se nada
+    mudou, não lê a planilha. Se só houve inclusões no fim (ou edições
+    recentes), busca apenas o intervalo alterado. Se o modifiedTime mudou sem
+    que a janela final explique a mudança, e não foi o próprio bot que
+    escreveu, a edição está numa linha antiga: recarrega tudo.
+    """
+    now = time.monotonic()
+    if not force and _cache["mtime"] is not None and now - _cache["checked"] < SYNC_INTERVAL:
+        return _cache["rows"]
+    _cache["checked"] = now
+    ws = sh.worksheet("Lançamentos")
+    mtime = sh.get_lastUpdateTime()
+    if mtime != _cache["mtime"] and not _cache["own_write"]:
+        # alguém (mão ou outra réplica) mexeu na planilha: grupos e categorias também
+        _tenants["stale"] = True
+    if _cache["mtime"] is None or force or now - _cache["full"] >= FULL_SYNC_INTERVAL:
+        _full_reload(ws, mtime)
+        return _cache["rows"]
+    if mtime == _cache["mtime"]:
+        return _cache["rows"]
+
+    ids = ws.col_values(1)[1:]
+    cached_ids = [r[0] for r in _cache["rows"]]
+    n = len(cached_ids)
+    if ids[:n] != cached_ids:
+        # linhas removidas ou reordenadas: não dá para saber o que mudou
+        _full_reload(ws, mtime)
+        return _cache["rows"]
+
+    # relê a janela final (edições recentes) e as linhas novas, numa só chamada
+    first = max(n - SYNC_WINDOW, 0)
+    last = len(ids)
+    fresh = []
+    if last > first:
+        last_col = chr(ord("A") + len(SHEETS["Lançamentos"]) - 1)
+        fresh = ws.get(f"A{first + 2}:{last_col}{last + 1}")
+        fresh = [_pad(r) for r in fresh]
+        fresh += [_pad([]) for _ in range(last - first - len(fresh))]
+    if fresh == _cache["rows"][first:] and not _cache["own_write"]:
+        # a mudança não está na janela final: edição manual numa linha antiga
+        _full_reload(ws, mtime)
+        return _cache["rows"]
+    if fresh != _cache["rows"][first:]:
+        _cache["rows"][first:] = fresh
+        _reindex()
+        _overlay_journal()
+    _cache["mtime"] = mtime
+    _cache["own_write"] = False
+    return _cache["rows"]
+
+def _row_to_dict(row):
+    return {
+        "ID": row[0],
+        "Timestamp": row[1],
+        "Telegram User ID": row[2],
+        "Nome": row[3],
+        "Tipo": row[4],
+        "Valor": row[5],
+        "Categoria": row[6],
+        "Descrição": row[7],
+        "Grupo": row[8] or row[2]
+    }
+
+def _load_tenants(force=False):
+    """
+    Carrega 'Grupos' e 'Categorias'. Recarrega quando o modifiedTime da
+    planilha (consultado por _sync_lancamentos) muda sem escrita do bot,
+    ou a cada FULL_SYNC_INTERVAL.
+    """
+    if _cache["mtime"] is not None:
+        _sync_lancamentos()
+    now = time.monotonic()
+    if (not force and not _tenants["stale"] and _tenants["groups"] is not None
+            and now - _tenants["loaded"] < FULL_SYNC_INTERVAL):
+        return
+    try:
+        grupos_rows = sh.worksheet("Grupos").get_all_values()[1:]
+        categorias_rows = sh.worksheet("Categorias").get_all_values()[1:]
+    except Exception as e:
+        if _tenants["groups"] is None or not _is_offline(e):
+            raise
+        print(f"Planilha indisponível, usando grupos/categorias em cache: {e}")
+        return
+    groups, known = {}, set()
+    for row in grupos_rows:
+        if len(row) > 1 and row[1]:
+            known.add(row[1])
+            if row[0]:
+                groups[row[0]] = row[1]
+    categories = {}
+    for row in categorias_rows:
+        cat = row[0].strip() if row else ""
+        tenant = row[1].strip() if len(row) > 1 else ""
+        cats = categories.setdefault(tenant, [])
+        if cat and cat not in cats:
+            cats.append(cat)
+    _tenants["groups"] = groups
+    _tenants["known"] = known
+    _tenants["categories"] = categories
+    _tenants["loaded"] = now
+    _tenants["stale"] = False
+
+def get_tenant(telegram_user_id):
+    """Retorna o grupo do usuário (o próprio ID se não estiver em nenhum grupo)."""
+    _load_tenants()
+    uid = str(telegram_user_id)
+    return _tenants["groups"].get(uid, uid)
+
+def _set_group(telegram_user_id, grupo):
+    """Grava o grupo do usuário na aba 'Grupos' ('' volta ao grupo pessoal)."""
+    _load_tenants()
+    uid = str(telegram_user_id)
+    ws = sh.worksheet("Grupos")
+    _mark_own_write()
+    vals = ws.col_values(1)
+    if uid in vals:
+        ws.update_cell(vals.index(uid) + 1, 2, grupo)
+    else:
+        ws.append_row([uid, grupo])
+    if grupo:
+        _tenants["groups"][uid] = grupo
+    else:
+        _tenants["groups"].pop(uid, None)
+
+def create_group(telegram_user_id):
+    """Cria um grupo novo com código aleatório, coloca o usuário nele e retorna o código."""
+    grupo = f"{GROUP_PREFIX}{secrets.token_hex(4)}"
+    _mark_own_write()
+    sh.worksheet("Grupos").append_row(["", grupo])
+    _tenants["known"].add(grupo)
+    _set_group(telegram_user_id, grupo)
+    return grupo
+
+def _group_exists(grupo):
+    """
+    Um código é de grupo se foi registrado em 'Grupos' ou, para grupos
+    anteriores ao registro, se ainda tem membros, lançamentos ou categorias.
+    IDs pessoais nunca contam, para ninguém entrar na carteira de outro.
+    """
+    if not grupo.startswith(GROUP_PREFIX):
+        return False
+    return (grupo in _tenants["known"] or grupo in _tenants["groups"].values()
+            or grupo in _tenants["categories"] or grupo in _cache["tenants"])
+
+def join_group(telegram_user_id, grupo):
+    """Entra num grupo existente; retorna True/False se o código não existe."""
+    _load_tenants(force=True)
+    if not _group_exists(grupo):
+        return False
+    _set_group(telegram_user_id, grupo)
+    return True
+
+def leave_group(telegram_user_id):
+    """Volta o usuário ao seu grupo pessoal."""
+    _set_group(telegram_user_id, "")
+
+def _is_offline(e):
+    """True se o erro indica API fora do ar/sem cota (vale tentar de novo depois)."""
+    if isinstance(e, gspread.exceptions.APIError):
+        return e.response.status_code in OFFLINE_STATUS
+    return isinstance(e, (requests.exceptions.RequestException, TransportError))
+
+def has_pending_writes():
+    """True se há escritas no journal aguardando a planilha."""
+    return bool(journal.pending())
+
+def _apply_to_cache(op):
+    """
+    Aplica a operação ao cache (idempotente, para poder ser reaplicada).
+    Atualiza os índices no lugar e só toca a partição do grupo da linha.
+    """
+    lid = str(op["id"])
+    row = _cache["by_id"].get(lid)
+    if op["op"] == "add":
+        if row is not None:
+            return
+        row = _pad([str(v) for v in op["row"]])
+        _cache["rows"].append(row)
+        _cache["by_id"][lid] = row
+        _cache["by_user"].setdefault(row[2], []).append(row)
+        _partition(_tenant_of(row))["rows"].append(row)
+    elif row is None:
+        return
+    elif op["op"] == "update":
+        for col, val in op["fields"].items():
+            row[int(col) - 1] = val
+    elif op["op"] == "delete":
+        del _cache["by_id"][lid]
+        _cache["rows"].remove(row)
+        if row in _cache["by_user"].get(row[2], []):
+            _cache["by_user"][row[2]].remove(row)
+        _partition(_tenant_of(row))["rows"].remove(row)
+    _touch(_tenant_of(row))
+
+def _overlay_journal():
+    """Reaplica no cache as operações pendentes, que a planilha ainda não tem."""
+    for op in journal.pending():
+        _apply_to_cache(op)
+
+def _row_index(ws, lanc_id):
+    """Linha (1-based) do lançamento na planilha, ou None."""
+    ids = ws.col_values(1)
+    try:
+        return ids.index(str(lanc_id)) + 1
+    except ValueError:
+        return None
+
+def _apply_to_sheet(op):
+    """Grava a operação na planilha. Retorna False se o ID não existir mais."""
+    ws = sh.worksheet("Lançamentos")
+    if op["op"] == "add":
+        row = list(op["row"])
+        if op.get("resolve_group"):
+            # incluído offline antes de conhecer os grupos: resolve agora
+            row[8] = get_tenant(row[2])
+        ws.append_row(row)
+        if op["id"] >= get_next_id():
+            update_last_id(op["id"])
+        return True
+    idx = _row_index(ws, op["id"])
+    if idx is None:
+        return False
+    if op["op"] == "update":
+        for col, val in op["fields"].items():
+            ws.update_cell(idx, int(col), val)
+    elif op["op"] == "delete":
+        ws.delete_rows(idx)
+    return True
+
+def _write(op):
+    """
+    Grava a operação no journal (durável) antes de tudo, atualiza o cache e
+    tenta levá-la à planilha. Se a API estiver indisponível, ela fica no
+    journal e é reaplicada depois, na ordem em que foi feita.
+    """
+    journal.append(op)
+    _apply_to_cache(op)
+    try:
+        replay_journal()
+    except Exception as e:
+        # a operação continua no journal; a reaplicação periódica tenta de novo
+        print(f"Falha ao reaplicar o journal: {e}")
+
+def replay_journal():
+    """
+    Reaplica o journal na planilha (ver journal.replay). Se algum ID foi
+    trocado por colisão, recarrega o cache para não editar a linha errada.
+    """
+    if not journal.pending():
+        return
+    _mark_own_write()
+    try:
+        ws = sh.worksheet("Lançamentos")
+        ids = ws.col_values(1)[1:]
+    except Exception as e:
+        if not _is_offline(e):
+            raise
+        print(f"Planilha ainda indisponível, {len(journal.pending())} operação(ões) no journal: {e}")
+        return
+    remapped = journal.replay(
+        ids,
+        lambda lid: ws.row_values(ids.index(lid) + 2),
+        _apply_to_sheet,
+        _is_offline
+    )
+    if remapped:
+        _sync_lancamentos(force=True)
+    else:
+        # o cache precisa ver as linhas gravadas pela reaplicação
+        _cache["checked"] = 0.0
+
+def _next_id():
+    """
+    Próximo ID: o de Config, mas nunca abaixo do maior ID conhecido no cache
+    ou no journal (que pode ter inclusões de outras réplicas). Offline, só
+    esses valem; uma colisão é corrigida na reaplicação (ver journal.replay).
+    """
+    known = max(
+        [int(r[0]) for r in _cache["rows"] if r[0].isdigit()] +
+        [int(op["id"]) for op in journal.pending() if op["op"] == "add" and str(op["id"]).isdigit()],
+        default=0
+    )
+    try:
+        return max(get_next_id(), known + 1) if not journal.pending() else known + 1
+    except Exception as e:
+        if not _is_offline(e):
+            raise
+        return known + 1
+
 def add_lancamento(telegram_user_id, nome, tipo, valor, categoria, descricao):
-    """Insere nova linha em 'Lançamentos' e atualiza Config. Retorna o ID gerado."""
-    new_id = get_next_id()
+    """
+    Insere nova linha em 'Lançamentos', no grupo atual do usuário, e atualiza
+    Config. Retorna o ID gerado. Se a planilha estiver indisponível, o
+    lançamento fica no journal local e é gravado depois, mesmo que o cache
+    ainda não tenha sido carregado.
+    """
+    try:
+        _sync_lancamentos()
+    except Exception as e:
+        if not _is_offline(e):
+            raise
+    new_id = _next_id()
     tz = pytz.timezone(os.getenv("TIMEZONE", "UTC"))
     ts = datetime.now(tz).strftime("%Y-%m-%d %H:%M")
     row = [
@@ -105,110 +562,166 @@ def add_lancamento(telegram_user_id, nome, tipo, valor, categoria, descricao):
         tipo,
         f"{valor:.2f}",
         categoria,
-        descricao or ""
+        descricao or "",
+        ""
     ]
-    sh.worksheet("Lançamentos").append_row(row)
-    update_last_id(new_id)
+    op = {"op": "add", "id": new_id, "row": row}
+    try:
+        row[8] = get_tenant(telegram_user_id)
+    except Exception as e:
+        if not _is_offline(e):
+            raise
+        op["resolve_group"] = True
+    _write(op)
     return new_id
 
-def get_last_lancamentos(telegram_user_id, limit=10):
-    """Retorna os últimos `limit` lançamentos do usuário."""
-    ws = sh.worksheet("Lançamentos")
-    rows = ws.get_all_values()[1:]
-    results = []
-    for row in rows:
-        if len(row) >= 3 and row[2] == str(telegram_user_id):
-            results.append({
-                "ID": row[0],
-                "Timestamp": row[1],
-                "Telegram User ID": row[2],
-                "Nome": row[3],
-                "Tipo": row[4],
-                "Valor": row[5],
-                "Categoria": row[6],
-                "Descrição": row[7] if len(row) > 7 else ""
-            })
-    return results[-limit:]
-
-def update_lancamento(lanc_id, valor=None, categoria=None, descricao=None):
-    """Atualiza o lançamento de ID=lanc_id nos campos fornecidos."""
-    ws = sh.worksheet("Lançamentos")
-    ids = ws.col_values(1)
-    try:
-        idx = ids.index(str(lanc_id)) + 1
-    except ValueError:
+def get_lancamento(lanc_id):
+    """Retorna o lançamento de ID=lanc_id como dict, ou None se não existir."""
+    _sync_lancamentos()
+    row = _cache["by_id"].get(str(lanc_id))
+    return _row_to_dict(row) if row else None
+
+def _match(row, filtro):
+    """
+    Aplica o filtro do seletor: nome de categoria, data (AAAA, AAAA-MM ou
+    AAAA-MM-DD, comparada com o início do Timestamp) ou texto na Descrição.
+    """
+    if filtro.lower() == row[6].lower():
+        return True
+    if DATE_FILTER.match(filtro):
+        return row[1].startswith(filtro)
+    return filtro.lower() in row[7].lower()
+
+def _search_rows(grupo, filtro):
+    """
+    Lista filtrada do grupo (mais recente primeiro) e a posição de cada ID
+    nela, memorizadas até o cache do grupo mudar.
+    """
+    part = _partition(grupo)
+    hit = part["search"].get(filtro)
+    if hit and hit[0] == part["version"]:
+        return hit[1], hit[2]
+    rows = part["rows"][::-1]
+    if filtro:
+        rows = [r for r in rows if _match(r, filtro)]
+    pos = {r[0]: i for i, r in enumerate(rows)}
+    part["search"][filtro] = (part["version"], rows, pos)
+    return rows, pos
+
+def search_lancamentos(grupo, filtro="", anchor=None, limit=PAGE_SIZE, sync=True):
+    """
+    Retorna uma página dos lançamentos do grupo, do mais recente para o mais
+    antigo, opcionalmente filtrados. A página começa no ID `anchor` (ou no
+    início), então inclusões entre uma página e outra não a deslocam.
+    Com sync=False (troca de página) é só uma consulta em memória.
+    Retorna dict com page, offset, total, prev e next (IDs âncora ou None).
+    """
+    if sync:
+        _sync_lancamentos()
+    rows, pos = _search_rows(grupo, (filtro or "").strip())
+    offset = pos.get(str(anchor), 0) if anchor is not None else 0
+    end = offset + limit
+    return {
+        "page": [_row_to_dict(r) for r in rows[offset:end]],
+        "offset": offset,
+        "total": len(rows),
+        "prev": rows[max(offset - limit, 0)][0] if offset > 0 else None,
+        "next": rows[end][0] if end < len(rows) else None
+    }
+
+def _check_tenant(lanc_id, grupo):
+    """Garante que o lançamento existe e pertence ao grupo."""
+    lanc = get_lancamento(lanc_id)
+    if lanc is None or lanc["Grupo"] != grupo:
         raise Exception(f"ID {lanc_id} não encontrado.")
+
+def update_lancamento(lanc_id, grupo, valor=None, categoria=None, descricao=None):
+    """Atualiza o lançamento de ID=lanc_id (do grupo) nos campos fornecidos."""
+    _check_tenant(lanc_id, grupo)
+    fields = {}
     if valor is not None:
-        ws.update_cell(idx, 6, f"{valor:.2f}")
+        fields[6] = f"{valor:.2f}"
     if categoria is not None:
-        ws.update_cell(idx, 7, categoria)
+        fields[7] = categoria
     if descricao is not None:
-        ws.update_cell(idx, 8, descricao)
+        fields[8] = descricao
+    _write({"op": "update", "id": str(lanc_id), "fields": fields})
 
-def delete_lancamento(lanc_id):
-    """Remove o lançamento de ID=lanc_id."""
-    ws = sh.worksheet("Lançamentos")
-    ids = ws.col_values(1)
-    try:
-        idx = ids.index(str(lanc_id)) + 1
-    except ValueError:
-        raise Exception(f"ID {lanc_id} não encontrado.")
-    ws.delete_rows(idx)
+def delete_lancamento(lanc_id, grupo):
+    """Remove o lançamento de ID=lanc_id (do grupo)."""
+    _check_tenant(lanc_id, grupo)
+    _write({"op": "delete", "id": str(lanc_id)})
 
 def get_all_lancamentos(telegram_user_id):
     """Retorna todos os lançamentos de um usuário como lista de dicts."""
-    ws = sh.worksheet("Lançamentos")
-    rows = ws.get_all_values()[1:]
+    _sync_lancamentos()
     out = []
-    for row in rows:
-        if len(row) >= 3 and row[2] == str(telegram_user_id):
-            out.append({
-                "ID": row[0],
-                "Timestamp": row[1],
-                "Telegram User ID": row[2],
-                "Nome": row[3],
-                "Tipo": row[4],
-                "Valor": float(row[5].replace(",", ".")),
-                "Categoria": row[6],
-                "Descrição": row[7] if len(row) > 7 else ""
-            })
+    for row in _cache["by_user"].get(str(telegram_user_id), []):
+        d = _row_to_dict(row)
+        d["Valor"] = float(row[5].replace(",", "."))
+        out.append(d)
     return out
 
 def get_all_user_ids():
-    """Retorna set de todos os Telegram User IDs na aba 'Lançamentos'."""
-    ws = sh.worksheet("Lançamentos")
-    vals = ws.col_values(3)[1:]
-    return set(vals)
+    """Retorna set de todos os Telegram User IDs em 'Lançamentos' e 'Grupos'."""
+    _sync_lancamentos()
+    _load_tenants()
+    return set(_cache["by_user"]) | set(_tenants["groups"])
 
-def get_categories():
-    """Retorna lista das categorias cadastradas."""
-    ws = sh.worksheet("Categorias")
-    vals = ws.col_values(1)[1:]
-    cats = []
-    for v in vals:
-        v = v.strip()
-        if v and v not in cats:
-            cats.append(v)
-    return cats
-
-def add_category(name):
-    """Adiciona categoria se não existir; retorna True/False."""
-    ws = sh.worksheet("Categorias")
-    cats = get_categories()
+def get_categories(grupo):
+    """
+    Retorna lista das categorias do grupo. Na primeira consulta de um grupo
+    que nunca teve categorias, copia o modelo (categorias sem grupo ou
+    DEFAULT_CATEGORIES). Um grupo que excluiu todas continua sem nenhuma.
+    """
+    _load_tenants()
+    if grupo in _tenants["categories"]:
+        return list(_tenants["categories"][grupo])
+    cats = list(_tenants["categories"].get("") or DEFAULT_CATEGORIES)
+    try:
+        _mark_own_write()
+        sh.worksheet("Categorias").append_rows([[c, grupo] for c in cats])
+    except Exception as e:
+        if not _is_offline(e):
+            raise
+        # offline: usa o modelo sem gravar; a cópia é feita quando a API voltar
+        return cats
+    _tenants["categories"][grupo] = cats
+    return list(cats)
+
+def add_category(name, grupo):
+    """Adiciona categoria ao grupo se não existir; retorna True/False."""
+    cats = get_categories(grupo)
     if name in cats:
         return False
-    ws.append_row([name])
+    _mark_own_write()
+    sh.worksheet("Categorias").append_row([name, grupo])
+    _tenants["categories"][grupo].append(name)
     return True
 
-def delete_category(name):
-    """Exclui categoria; retorna True se removeu, False se não achou."""
+def delete_category(name, grupo):
+    """
+    Exclui categoria do grupo (todas as linhas repetidas, caso duas réplicas
+    tenham copiado o modelo); retorna True se removeu, False se não achou.
+    Se o grupo ficar sem categorias, deixa uma linha só com o 'Grupo' para
+    que o modelo não seja copiado de novo.
+    """
     ws = sh.worksheet("Categorias")
-    vals = ws.col_values(1)
-    try:
-        idx = vals.index(name) + 1
-    except ValueError:
+    vals = ws.get_all_values()
+    idxs = [
+        i + 1 for i, row in enumerate(vals)
+        if i > 0 and len(row) > 1 and row[0].strip() == name and row[1].strip() == grupo
+    ]
+    if not idxs:
         return False
-    ws.delete_rows(idx)
+    _mark_own_write()
+    for idx in reversed(idxs):
+        ws.delete_rows(idx)
+    cats = _tenants["categories"].setdefault(grupo, [])
+    if name in cats:
+        cats.remove(name)
+    if not cats:
+        ws.append_row(["", grupo])
     return True
 
 def _get_period_range(period):
@@ -234,14 +747,15 @@ def _get_period_range(period):
         raise ValueError("Período inválido")
     return start, end
 
-def generate_report(period):
+def generate_report(period, grupo):
     """
-    Gera relatório para 'Semanal', 'Quinzenal' ou 'Mensal'.
+    Gera relatório do grupo para 'Semanal', 'Quinzenal' ou 'Mensal'.
     Retorna dict com totals_cat, totals_user, total_geral, start e end.
     """
     start, end = _get_period_range(period)
     tz = pytz.timezone(os.getenv("TIMEZONE", "UTC"))
-    rows = sh.worksheet("Lançamentos").get_all_values()[1:]
+    _sync_lancamentos()
+    rows = _partition(grupo)["rows"]
     totals_cat = defaultdict(float)
     totals_user = defaultdict(float)
     for row in rows:
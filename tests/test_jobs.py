@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from apscheduler.triggers.cron import CronTrigger
+
+import jobs
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DB", str(tmp_path / "jobs.db"))
+    jobs.init_db()
+
+
+def test_init_db_reports_first_creation():
+    assert jobs.init_db() is False
+
+
+def test_lease_is_exclusive_until_it_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    assert jobs.acquire_lease("rel", 60, owner="a")
+    assert not jobs.acquire_lease("rel", 60, owner="b")
+    assert jobs.acquire_lease("rel", 60, owner="a")  # renovação
+    now[0] += 61
+    assert jobs.acquire_lease("rel", 60, owner="b")  # expirou: b assume
+    assert not jobs.acquire_lease("rel", 60, owner="a")
+
+
+def test_release_only_by_owner():
+    assert jobs.acquire_lease("rel", 60, owner="a")
+    jobs.release_lease("rel", owner="b")
+    assert not jobs.acquire_lease("rel", 60, owner="b")
+    jobs.release_lease("rel", owner="a")
+    assert jobs.acquire_lease("rel", 60, owner="b")
+
+
+def test_claim_delivery_is_won_by_exactly_one_replica():
+    results = []
+    barrier = threading.Barrier(8)
+
+    def claim(owner):
+        barrier.wait()
+        results.append(jobs.claim_delivery("rel_semanal", "k", 42, owner=owner))
+
+    threads = [threading.Thread(target=claim, args=(f"r{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+    assert not jobs.claim_delivery("rel_semanal", "k", "42")
+    assert jobs.claim_delivery("rel_semanal", "k2", 42)
+
+
+def test_runs_are_persisted():
+    assert jobs.start_run("rel_mensal", "k") is False
+    assert jobs.start_run("rel_mensal", "k") is False
+    jobs.finish_run("rel_mensal", "k")
+    assert jobs.start_run("rel_mensal", "k") is True
+    jobs.finish_run("rel_mensal", "k2")  # registra direto como concluída
+    assert jobs.start_run("rel_mensal", "k2") is True
+
+
+def test_jitter_is_deterministic_and_inside_window():
+    assert jobs.jitter(1, "k", 1800) == jobs.jitter(1, "k", 1800)
+    assert all(0 <= jobs.jitter(u, "k", 1800) < 1800 for u in range(200))
+    assert jobs.jitter(1, "k", 0) == 0
+
+
+def test_last_fire_time_month_end():
+    tz = pytz.timezone("America/Sao_Paulo")
+    trigger = CronTrigger(day="last", hour=18, minute=0, timezone=tz)
+    now = tz.localize(datetime(2026, 3, 1, 10, 0))
+    fire = jobs.last_fire_time(trigger, now, timedelta(hours=24))
+    assert fire == tz.localize(datetime(2026, 2, 28, 18, 0))
+    assert jobs.last_fire_time(trigger, now, timedelta(hours=12)) is None
+
+
+def test_last_fire_time_picks_latest_of_several():
+    tz = pytz.timezone("UTC")
+    trigger = CronTrigger(hour="*", minute=0, timezone=tz)
+    now = tz.localize(datetime(2026, 1, 1, 5, 30))
+    assert jobs.last_fire_time(trigger, now, timedelta(hours=24)) == tz.localize(datetime(2026, 1, 1, 5, 0))
+
+
+def test_last_fire_time_across_dst_change():
+    tz = pytz.timezone("America/New_York")
+    trigger = CronTrigger(hour=9, minute=0, timezone=tz)
+    # horário de verão começa em 2026-03-08 às 02:00
+    now = tz.localize(datetime(2026, 3, 8, 12, 0))
+    fire = jobs.last_fire_time(trigger, now, timedelta(hours=24))
+    assert (fire.hour, fire.minute) == (9, 0)
+    assert fire.date() == now.date()
+    assert fire.utcoffset() == timedelta(hours=-4)
+    before = jobs.last_fire_time(trigger, fire - timedelta(minutes=1), timedelta(hours=36))
+    assert before.utcoffset() == timedelta(hours=-5)
+    assert fire - before == timedelta(hours=23)
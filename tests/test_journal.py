@@ -0,0 +1,211 @@
+import fcntl
+import json
+
+import pytest
+
+import journal
+
+
+class Offline(Exception):
+    pass
+
+
+class FakeSheet:
+    """Aba 'Lançamentos' em memória: lista de linhas [ID, Timestamp, User, ...]."""
+
+    def __init__(self, rows=()):
+        self.rows = [list(r) for r in rows]
+        self.fail_after = None  # número de escritas antes de ficar offline
+
+    def ids(self):
+        return [r[0] for r in self.rows]
+
+    def read_row(self, lid):
+        return next(r for r in self.rows if r[0] == lid)
+
+    def _write(self):
+        if self.fail_after is not None:
+            if self.fail_after == 0:
+                raise Offline("429")
+            self.fail_after -= 1
+
+    def apply(self, op):
+        self._write()
+        lid = str(op["id"])
+        if op["op"] == "add":
+            self.rows.append([str(v) for v in op["row"]])
+            return True
+        row = next((r for r in self.rows if r[0] == lid), None)
+        if row is None:
+            return False
+        if op["op"] == "update":
+            for col, val in op["fields"].items():
+                row[int(col) - 1] = val
+        else:
+            self.rows.remove(row)
+        return True
+
+    def replay(self):
+        return journal.replay(self.ids(), self.read_row, self.apply, lambda e: isinstance(e, Offline))
+
+
+def add(lid, ts="2026-10-01 10:00", user="1"):
+    return {"op": "add", "id": lid, "row": [lid, ts, user, "Ana", "Despesa", "10.00", "Mercado", ""]}
+
+
+@pytest.fixture(autouse=True)
+def journal_path(tmp_path, monkeypatch):
+    path = tmp_path / "journal.jsonl"
+    monkeypatch.setattr(journal, "JOURNAL_PATH", str(path))
+    monkeypatch.setattr(journal, "_pending", None)
+    return path
+
+
+def reload():
+    journal._pending = None
+    return journal.pending()
+
+
+def test_append_assigns_increasing_seq_and_survives_reload():
+    assert journal.append(add(1)) == 1
+    assert journal.append({"op": "delete", "id": 1}) == 2
+    assert [op["seq"] for op in reload()] == [1, 2]
+
+
+def test_truncated_last_line_is_ignored_and_closed(journal_path):
+    journal.append(add(1))
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": 2, "se')
+    assert [op["id"] for op in reload()] == [1]
+    journal.append(add(3))
+    ops = reload()
+    assert [(op["id"], op["seq"]) for op in ops] == [(1, 1), (3, 2)]
+
+
+def test_duplicate_seq_lines_are_read_once(journal_path):
+    journal.append(add(1))
+    line = journal_path.read_text(encoding="utf-8")
+    journal_path.write_text(line + line, encoding="utf-8")
+    assert len(reload()) == 1
+
+
+def test_compact_drops_applied_ops_on_disk(journal_path):
+    for lid in (1, 2, 3):
+        journal.append(add(lid))
+    journal.compact(2)
+    assert [op["id"] for op in journal.pending()] == [3]
+    assert [json.loads(l)["id"] for l in journal_path.read_text().splitlines()] == [3]
+    assert [op["id"] for op in reload()] == [3]
+
+
+def test_replay_applies_in_order_and_empties_journal():
+    sheet = FakeSheet([["1", "2026-09-01 10:00", "1"]])
+    journal.append(add(2))
+    journal.append({"op": "update", "id": "2", "fields": {"6": "20.00"}})
+    journal.append({"op": "delete", "id": "1"})
+    assert sheet.replay() == {}
+    assert sheet.ids() == ["2"]
+    assert sheet.rows[0][5] == "20.00"
+    assert reload() == []
+
+
+def test_replay_skips_add_already_written():
+    journal.append(add(2))
+    sheet = FakeSheet()
+    sheet.apply(add(2))  # escrita feita, mas o journal não foi compactado
+    sheet.replay()
+    assert sheet.ids() == ["2"]
+    assert reload() == []
+
+
+def test_replay_remaps_colliding_id_with_dependent_ops():
+    sheet = FakeSheet([["5", "2026-10-01 09:00", "99"]])  # ID 5 usado por outro
+    journal.append(add(5))
+    journal.append({"op": "update", "id": "5", "fields": {"8": "editado"}})
+    assert sheet.replay() == {"5": "6"}
+    assert sheet.read_row("5")[2] == "99"  # a linha do outro usuário fica intacta
+    assert sheet.read_row("6")[2] == "1"
+    assert sheet.read_row("6")[7] == "editado"
+
+
+def test_remap_survives_outage_before_dependent_ops():
+    sheet = FakeSheet([["5", "2026-10-01 09:00", "99", "", "", "1.00"]])
+    journal.append(add(5))
+    journal.append({"op": "delete", "id": "5"})
+    sheet.fail_after = 1  # grava a inclusão remapeada e cai antes da exclusão
+    sheet.replay()
+    pending = reload()  # como após reiniciar o processo
+    assert [(op["op"], op["id"]) for op in pending] == [("delete", 6)]
+    sheet.fail_after = None
+    sheet.replay()
+    assert sheet.ids() == ["5"]  # só a linha do outro usuário, que não foi apagada
+    assert reload() == []
+
+
+def test_replay_stops_at_outage_and_keeps_order():
+    sheet = FakeSheet()
+    for lid in (1, 2, 3):
+        journal.append(add(lid))
+    sheet.fail_after = 1
+    sheet.replay()
+    assert sheet.ids() == ["1"]
+    assert [op["id"] for op in reload()] == [2, 3]
+    sheet.fail_after = None
+    sheet.replay()
+    assert sheet.ids() == ["1", "2", "3"]
+
+
+def test_replay_drops_ops_for_missing_ids():
+    sheet = FakeSheet()
+    journal.append({"op": "update", "id": "7", "fields": {"6": "1.00"}})
+    sheet.replay()
+    assert reload() == []
+
+
+def test_non_offline_error_keeps_unapplied_ops():
+    sheet = FakeSheet()
+    journal.append(add(1))
+    journal.append(add(2))
+
+    def apply(op):
+        if op["id"] == 2:
+            raise PermissionError("403")
+        return sheet.apply(op)
+
+    with pytest.raises(PermissionError):
+        journal.replay(sheet.ids(), sheet.read_row, apply, lambda e: False)
+    assert [op["id"] for op in reload()] == [2]
+
+
+def other_process_appends(journal_path, op):
+    """Simula outra réplica acrescentando ao mesmo arquivo (sem passar pelo cache deste processo)."""
+    seqs = [json.loads(l)["seq"] for l in journal_path.read_text(encoding="utf-8").splitlines()]
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(dict(op, seq=max(seqs, default=0) + 1)) + "\n")
+
+
+def test_append_rereads_disk_before_assigning_seq(journal_path):
+    journal.append(add(1))
+    other_process_appends(journal_path, add(2))
+    assert journal.append(add(3)) == 3
+    assert [(op["id"], op["seq"]) for op in reload()] == [(1, 1), (2, 2), (3, 3)]
+
+
+def test_compact_keeps_ops_appended_by_other_process(journal_path):
+    journal.append(add(1))
+    journal.pending()
+    other_process_appends(journal_path, add(2))
+    journal.compact(1)
+    assert [op["id"] for op in reload()] == [2]
+
+
+def test_replay_is_skipped_while_other_process_replays(journal_path):
+    journal.append(add(1))
+    sheet = FakeSheet()
+    with open(str(journal_path) + ".replay", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        assert sheet.replay() == {}
+        fcntl.flock(f, fcntl.LOCK_UN)
+    assert sheet.ids() == []
+    sheet.replay()
+    assert sheet.ids() == ["1"]
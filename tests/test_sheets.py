@@ -0,0 +1,200 @@
+import re
+from unittest import mock
+
+import pytest
+
+import journal
+
+# sheets.py conecta na planilha ao ser importado: as credenciais e o cliente
+# são trocados aqui e cada teste usa uma planilha em memória (FakeSpreadsheet)
+with mock.patch("google.oauth2.service_account.Credentials.from_service_account_file"), \
+        mock.patch("gspread.authorize"):
+    import sheets
+
+
+class FakeWorksheet:
+    """Aba em memória (cabeçalho incluso) com a parte da API do gspread usada por sheets.py."""
+
+    def __init__(self, sh, title, rows):
+        self.sh = sh
+        self.title = title
+        self.rows = [[str(v) for v in r] for r in rows]
+
+    def _call(self, name, write=False):
+        self.sh.calls.append((self.title, name))
+        if write:
+            self.sh.mtime += 1
+
+    def row_values(self, idx):
+        self._call("row_values")
+        return list(self.rows[idx - 1]) if idx <= len(self.rows) else []
+
+    def col_values(self, col):
+        self._call("col_values")
+        return [r[col - 1] if len(r) >= col else "" for r in self.rows]
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        return [list(r) for r in self.rows]
+
+    def get(self, rng):
+        self._call("get")
+        first, last = map(int, re.findall(r"\d+", rng))
+        return [list(r) for r in self.rows[first - 1:last]]
+
+    def append_row(self, row):
+        self._call("append_row", write=True)
+        self.rows.append([str(v) for v in row])
+
+    def append_rows(self, rows):
+        self._call("append_rows", write=True)
+        self.rows += [[str(v) for v in r] for r in rows]
+
+    def insert_row(self, row, index):
+        self._call("insert_row", write=True)
+        self.rows.insert(index - 1, [str(v) for v in row])
+
+    def update_cell(self, row, col, value):
+        self._call("update_cell", write=True)
+        self.rows[row - 1][col - 1] = str(value)
+
+    def delete_rows(self, idx):
+        self._call("delete_rows", write=True)
+        del self.rows[idx - 1]
+
+
+class FakeSpreadsheet:
+    """
+    Planilha em memória. `mtime` faz o papel do modifiedTime do Drive e
+    `calls` registra cada chamada à API. Alterações "à mão" (outra pessoa
+    editando a planilha) são feitas direto em `ws.rows`, com hand_edit().
+    """
+
+    def __init__(self, lancamentos, grupos=()):
+        self.calls = []
+        self.mtime = 1
+        self.tabs = {
+            "Lançamentos": FakeWorksheet(self, "Lançamentos", [sheets.SHEETS["Lançamentos"]] + list(lancamentos)),
+            "Config": FakeWorksheet(self, "Config", [["Último ID"], [str(len(lancamentos))]]),
+            "Categorias": FakeWorksheet(self, "Categorias", [sheets.SHEETS["Categorias"]]),
+            "Grupos": FakeWorksheet(self, "Grupos", [sheets.SHEETS["Grupos"]] + list(grupos)),
+        }
+
+    def worksheet(self, name):
+        return self.tabs[name]
+
+    def get_lastUpdateTime(self):
+        self.calls.append(("", "get_lastUpdateTime"))
+        return str(self.mtime)
+
+    def hand_edit(self):
+        self.mtime += 1
+        return self.tabs["Lançamentos"].rows
+
+    def full_reloads(self):
+        return self.calls.count(("Lançamentos", "get_all_values"))
+
+
+def lanc(lid, grupo="g-a", user="1", desc=""):
+    return [lid, f"2026-10-{lid % 28 + 1:02d} 10:00", user, "Ana", "Despesa", "10.00", "Mercado", desc, grupo]
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    """Planilha com 12 lançamentos: os ímpares no grupo g-a, os pares no g-b."""
+    sh = FakeSpreadsheet(
+        [lanc(i, "g-a" if i % 2 else "g-b") for i in range(1, 13)],
+        grupos=[["1", "g-a"], ["2", "g-b"]]
+    )
+    monkeypatch.setattr(sheets, "sh", sh)
+    monkeypatch.setattr(sheets, "SYNC_INTERVAL", 0)
+    monkeypatch.setattr(sheets, "SYNC_WINDOW", 3)
+    monkeypatch.setattr(sheets, "_cache", {
+        "rows": [], "mtime": None, "checked": 0.0, "full": 0.0,
+        "own_write": False, "by_id": {}, "by_user": {}, "tenants": {}
+    })
+    monkeypatch.setattr(sheets, "_tenants", {
+        "groups": None, "known": set(), "categories": None, "loaded": 0.0, "stale": False
+    })
+    monkeypatch.setattr(journal, "JOURNAL_PATH", str(tmp_path / "journal.jsonl"))
+    monkeypatch.setattr(journal, "_pending", None)
+    sheets.load_cache()
+    return sh
+
+
+def ids(grupo):
+    return [r[0] for r in sheets._partition(grupo)["rows"]]
+
+
+def test_tail_append_reads_only_the_window(fake):
+    fake.hand_edit().append([str(v) for v in lanc(13)])
+    sheets._sync_lancamentos()
+    assert fake.full_reloads() == 1  # só a da carga inicial
+    assert ("Lançamentos", "get") in fake.calls
+    assert ids("g-a")[-1] == "13"
+
+
+def test_hand_edit_of_old_row_forces_full_reload(fake):
+    fake.hand_edit()[1][5] = "99.00"  # ID 1, fora da janela final
+    before = fake.full_reloads()
+    sheets._sync_lancamentos()
+    assert fake.full_reloads() == before + 1
+    assert sheets._cache["by_id"]["1"][5] == "99.00"
+
+
+def test_delete_in_the_middle_forces_full_reload(fake):
+    del fake.hand_edit()[5]  # ID 5
+    before = fake.full_reloads()
+    sheets._sync_lancamentos()
+    assert fake.full_reloads() == before + 1
+    assert "5" not in sheets._cache["by_id"]
+    assert "5" not in ids("g-a")
+
+
+def test_own_write_does_not_force_full_reload(fake):
+    before = fake.full_reloads()
+    new_id = sheets.add_lancamento(1, "Ana", "Despesa", 5.0, "Mercado", "pão")
+    sheets._sync_lancamentos()
+    sheets._sync_lancamentos()
+    assert fake.full_reloads() == before
+    assert new_id == 13
+    assert fake.tabs["Lançamentos"].rows[-1][0] == "13"
+    assert ids("g-a")[-1] == "13"
+    assert not sheets._cache["own_write"]
+
+
+def test_page_turns_without_sync_make_no_api_calls(fake):
+    first = sheets.search_lancamentos("g-a", limit=2)
+    calls = len(fake.calls)
+    second = sheets.search_lancamentos("g-a", anchor=first["next"], limit=2, sync=False)
+    back = sheets.search_lancamentos("g-a", anchor=second["prev"], limit=2, sync=False)
+    assert len(fake.calls) == calls
+    assert [l["ID"] for l in second["page"]] == ["7", "5"]
+    assert back["page"] == first["page"]
+
+
+def test_anchor_is_stable_after_insert(fake):
+    first = sheets.search_lancamentos("g-a", limit=2)
+    anchor = first["next"]
+    expected = sheets.search_lancamentos("g-a", anchor=anchor, limit=2, sync=False)["page"]
+    sheets.add_lancamento(1, "Ana", "Despesa", 5.0, "Mercado", "")
+    page = sheets.search_lancamentos("g-a", anchor=anchor, limit=2)
+    assert page["page"] == expected
+    assert page["total"] == first["total"] + 1
+
+
+def test_changes_invalidate_only_their_group(fake):
+    sheets.search_lancamentos("g-a", "Mercado")
+    sheets.search_lancamentos("g-b", "Mercado")
+    part_b = sheets._partition("g-b")
+    memo_b, version_b = dict(part_b["search"]), part_b["version"]
+    version_a = sheets._partition("g-a")["version"]
+
+    sheets.add_lancamento(1, "Ana", "Despesa", 5.0, "Mercado", "")  # usuário 1 está no g-a
+    fake.hand_edit().append([str(v) for v in lanc(14, "g-a")])
+    sheets._sync_lancamentos()
+
+    assert sheets._partition("g-b") is part_b
+    assert part_b["version"] == version_b and part_b["search"] == memo_b
+    assert sheets._partition("g-a")["version"] > version_a
+    assert sheets.search_lancamentos("g-a", "Mercado", sync=False)["total"] == 8